@@ -1,53 +1,88 @@
+import random
+from array import array
+
+# Contracts a requester may cite in a warrant; only some match a node's data
+CONTRACT_IDS = ('contract_XYZ', 'contract_ABC')
+
+# Policy / contract strings interned to small ints, shared by all nodes
+POLICY_IDS = {}
+
+def intern_policy(policy):
+    return POLICY_IDS.setdefault(policy, len(POLICY_IDS))
+
 class PersonaManager:
     def __init__(self, node_id):
         self.node_id = node_id
         # Private chain data with consent policies
-        self.chain = {
+        chain = {
             'data_1': {'value': 'secret_A', 'policy': 'private'},
             'data_2': {'value': 'public_B', 'policy': 'contract_XYZ'}
         }
+        # Kept as parallel arrays, with policies interned to ints
+        self.keys = list(chain)
+        self.values = [item['value'] for item in chain.values()]
+        self.policies = array('i', (intern_policy(item['policy']) for item in chain.values()))
+        self.policy_by_key = dict(zip(self.keys, self.policies))
 
     def handle_request(self, warrant):
         # Check warrant and return ONLY authorized data
+        contract_id = POLICY_IDS.get(warrant['contract_id'])
         authorized_data = {}
-        for key, item in self.chain.items():
-            if item['policy'] == warrant['contract_id']:
-                authorized_data[key] = item['value']
+        for key, value, policy in zip(self.keys, self.values, self.policies):
+            if policy == contract_id:
+                authorized_data[key] = value
         return authorized_data
 
 class RedTeamAuditor:
     def __init__(self, network_nodes):
         self.nodes = network_nodes
         self.violations = 0
+        self.violation_keys = []
 
-    def audit_traffic(self, traffic_log):
-        # Scan traffic and verify against original data policies
-        for packet in traffic_log:
-            source_node = self.nodes[packet['source_id']]
-            for data_key, data_value in packet['data'].items():
-                original_policy = source_node.chain[data_key]['policy']
+    def audit_traffic(self, traffic):
+        # Scan traffic (any iterable of packets, consumed once) and verify
+        # against original data policies
+        nodes = self.nodes
+        intern_lookup = POLICY_IDS.get
+        violation_keys = self.violation_keys
+        for packet in traffic:
+            policy_by_key = nodes[packet['source_id']].policy_by_key
+            contract_id = intern_lookup(packet['warrant']['contract_id'])
+            # Packets only carry a couple of items, so comparing them in place
+            # is cheaper than gathering them into arrays for a bulk compare
+            for data_key in packet['data']:
                 # If the data was sent without a matching warrant, it's a violation
-                if original_policy != packet['warrant']['contract_id']:
-                    self.violations += 1
-                    print(f"VIOLATION DETECTED: {data_key} disclosed without consent!")
+                if policy_by_key[data_key] != contract_id:
+                    violation_keys.append(data_key)
+        self.violations = len(violation_keys)
 
 # --- Simulation Runner ---
 def run_privacy_simulation(num_interactions=30000):
     nodes = {f'node_{i}': PersonaManager(f'node_{i}') for i in range(500)}
-    traffic_log = []
+    node_ids = list(nodes)
 
-    for _ in range(num_interactions):
-        # 1. Randomly select two nodes (A and B)
-        # 2. Node A creates a warrant (sometimes valid, sometimes not for testing)
-        # 3. Node A requests data from Node B
-        # 4. Node B handles the request and returns data
-        # 5. Log the entire transaction (request, warrant, response) to traffic_log
-        pass # Placeholder for interaction logic
+    def interactions():
+        # Packets are produced lazily, so the audit never holds the full log
+        for _ in range(num_interactions):
+            # 1. Randomly select two nodes (A and B)
+            node_a, node_b = random.sample(node_ids, 2)
+            # 2. Node A creates a warrant (sometimes valid, sometimes not for testing)
+            warrant = {'issuer_id': node_a, 'contract_id': random.choice(CONTRACT_IDS)}
+            # 3. Node A requests data from Node B
+            # 4. Node B handles the request and returns data
+            data = nodes[node_b].handle_request(warrant)
+            # 5. Hand the entire transaction (request, warrant, response) to the audit
+            yield {'source_id': node_b, 'requester_id': node_a,
+                   'warrant': warrant, 'data': data}
 
     # --- Perform Audit ---
     auditor = RedTeamAuditor(nodes)
-    auditor.audit_traffic(traffic_log)
+    auditor.audit_traffic(interactions())
 
+    if auditor.violation_keys:
+        # Report a sample; the full list stays on the auditor
+        sample = ', '.join(auditor.violation_keys[:10])
+        print(f"VIOLATIONS DETECTED: {auditor.violations} (first: {sample}) disclosed without consent!")
     print(f"Privacy Robustness Simulation Complete.")
     print(f"Total Interactions: {num_interactions}")
     print(f"Unconsented Disclosures Detected: {auditor.violations}")
@@ -1,25 +1,69 @@
 import random
 import collections
+import itertools
+import os
 import time
-from typing import Dict, List, Set, Optional, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Set, Tuple, Optional, Any
 
 class Transaction:
-    def __init__(self, tx_id: str, participants: List[str], data: Dict):
+    """A bilateral transaction; same_data() compares payloads.
+
+    Differing hashes reject fast, otherwise the data itself is compared, so
+    hash collisions and unhashable payloads are still judged by value:
+
+    >>> Transaction('t', [0, 1], {'v': -1}).same_data(Transaction('t', [0, 1], {'v': -2}))
+    False
+
+    >>> a = Transaction('t', [0, 1], {'x': {'a': 1, 'b': 2}})
+    >>> a.same_data(Transaction('t', [0, 1], {'x': {'b': 2, 'a': 1}}))
+    True
+    >>> a.same_data(Transaction('t', [0, 1], {'x': {'a': 1, 'b': 3}}))
+    False
+    >>> Transaction('t', [0, 1], {1: [1], 'a': 2}).same_data(
+    ...     Transaction('t', [0, 1], {'a': 2, 1: [1]}))
+    True
+    """
+    __slots__ = ('tx_id', 'participants', 'data', 'timestamp', '_data_hash')
+    _counter = itertools.count()  # Logical clock shared by all transactions
+
+    def __init__(self, tx_id: str, participants: Iterable[int], data: Dict):
         self.tx_id = tx_id
-        self.participants = sorted(participants)  # Consistent ordering
-        self.data = data
-        self.timestamp = time.time()
+        # Interned node ids (NetworkNode.index), in consistent order
+        self.participants: Tuple[int, ...] = tuple(sorted(participants))
+        self.data = data  # Hashed once below; not mutated afterwards
+        self.timestamp = next(Transaction._counter)
+        # Builtin hash over the items beats serialising them for xxhash or
+        # blake2b; it only has to flag divergent copies of one tx_id
+        self._data_hash: Optional[int]
+        try:
+            self._data_hash = hash(frozenset(data.items()))
+        except TypeError:  # Unhashable values, e.g. nested dicts or lists
+            self._data_hash = None
+
+    def same_data(self, other: 'Transaction') -> bool:
+        if self is other:
+            return True
+        if (self._data_hash is not None and other._data_hash is not None
+                and self._data_hash != other._data_hash):
+            return False
+        return self.data == other.data
 
 class NetworkNode:
+    __slots__ = ('node_id', 'index', 'is_sybil', 'chain', '_chain_list', 'greylisted',
+                 'successful_interactions', '_interactions_total', 'trust_threshold')
+
     def __init__(self, node_id: str, is_sybil: bool = False):
         self.node_id = node_id
+        self.index = -1  # Interned id, assigned by Network.add_node
         self.is_sybil = is_sybil
         self.chain: Dict[str, Transaction] = {}
+        self._chain_list: List[Transaction] = []  # chain.values(), kept in sync
         self.greylisted = False
-        self.known_discrepancies: Set[str] = set()
-        self.successful_interactions: Dict[str, int] = collections.defaultdict(int)
+        # Keyed by the other node's interned id (Network.add_node)
+        self.successful_interactions: Dict[int, int] = collections.defaultdict(int)
+        self._interactions_total = 0  # sum(successful_interactions.values())
         self.trust_threshold = 20
-        self.trust_scores: Dict[str, float] = collections.defaultdict(float)
 
     def verify_trust(self, target_node: 'NetworkNode', network: 'Network') -> Dict[str, Any]:
         """Simulate the trust verification UI flow"""
@@ -28,52 +72,65 @@ class NetworkNode:
             'confidence': 0.0,
             'hops': 0,
             'trusted_path_found': False,
-            'network_available': network.is_online()
+            'network_available': network.online
         }
         
         if not result['network_available']:
             result['status'] = 'verification_paused'
             return result
             
-        if not self.chain:
+        # Guard on the list the walk indexes, not the public chain dict
+        chain_list = self._chain_list
+        if not chain_list:
             result['status'] = 'no_transaction_history'
             return result
             
-        tx = random.choice(list(self.chain.values()))
+        # The walk runs on locals; result is only filled in once it ends
+        _rr = random.randrange
+        node_list = network._node_list
+        trusted_set = network._trusted_set
+        confidence = 0.0
+        hops = 0
+        half_pow = 1.0  # 0.5 ** hops, kept as a running product
+        found = False
+        tx = chain_list[_rr(len(chain_list))]
         visited = set()
         max_hops = 20
         
-        while result['confidence'] < 0.99 and result['hops'] < max_hops:
-            result['hops'] += 1
-            participants = [p for p in tx.participants if p in network.nodes]
-            
-            trusted = [p for p in participants 
-                      if network.nodes[p]._is_trusted(threshold=self.trust_threshold)]
+        while confidence < 0.99 and hops < max_hops:
+            hops += 1
+            half_pow *= 0.5
+            participants = tx.participants
             
-            if trusted:
-                result['trusted_path_found'] = True
-                result['confidence'] = min(1.0, result['confidence'] + 0.5)
+            if not trusted_set.isdisjoint(participants):
+                found = True
+                confidence = min(1.0, confidence + 0.5)
                 break
                 
             next_node_id = self._select_next_hop(participants, network, visited)
-            if not next_node_id:
+            if next_node_id is None:
                 break
                 
-            next_node = network.nodes[next_node_id]
+            next_node = node_list[next_node_id]
             visited.add(next_node_id)
             
             if self._verify_chain_consistency(next_node.chain, tx):
-                result['confidence'] = 1 - (0.5 ** result['hops'])
+                confidence = 1.0 - half_pow
             else:
-                result['confidence'] *= 0.8
+                confidence *= 0.8
                 
-            if not next_node.chain:
+            chain_list = next_node._chain_list
+            len_chain = len(chain_list)
+            if not len_chain:
                 break
-            tx = random.choice(list(next_node.chain.values()))
+            tx = chain_list[_rr(len_chain)]
             
-        if result['confidence'] >= 0.99:
+        result['confidence'] = confidence
+        result['hops'] = hops
+        result['trusted_path_found'] = found
+        if confidence >= 0.99:
             result['status'] = 'verified'
-        elif result['confidence'] >= 0.7:
+        elif confidence >= 0.7:
             result['status'] = 'likely_verified'
         else:
             result['status'] = 'unverified'
@@ -81,34 +138,34 @@ class NetworkNode:
         return result
 
     def _is_trusted(self, threshold: int) -> bool:
-        return sum(self.successful_interactions.values()) > threshold * 10
+        return self._interactions_total > threshold * 10
 
-    def _select_next_hop(self, participants: List[str], network: 'Network', 
-                        visited: Set[str]) -> Optional[str]:
+    def _select_next_hop(self, participants: Tuple[int, ...], network: 'Network', 
+                        visited: Set[int]) -> Optional[int]:
         available = [p for p in participants 
-                    if p != self.node_id 
-                    and p not in visited
-                    and p in network.nodes]
+                    if p != self.index 
+                    and p not in visited]
         return random.choice(available) if available else None
 
     def _verify_chain_consistency(self, chain: Dict[str, Transaction], 
                                  tx: Transaction) -> bool:
-        if tx.tx_id not in chain:
-            return False
-        return chain[tx.tx_id].data == tx.data
+        existing = chain.get(tx.tx_id)
+        return existing is not None and existing.same_data(tx)
 
     def should_interact_with(self, other_node: 'NetworkNode') -> bool:
         """Determine if this node should interact with another node based on history"""
         if not other_node.greylisted:
             return True
-        return (self.successful_interactions.get(other_node.node_id, 0) >= 
+        return (self.successful_interactions.get(other_node.index, 0) >= 
                 self.trust_threshold)
 
 class Network:
     def __init__(self):
         self.nodes: Dict[str, NetworkNode] = {}
+        self._node_list: List[NetworkNode] = []  # nodes.values(), kept in sync
         self.transactions: Dict[str, Transaction] = {}
-        self.global_greylist: Set[str] = set()
+        self.global_greylist: Set[int] = set()  # Interned node ids
+        self._trusted_set: Set[int] = set()  # Interned ids passing _is_trusted
         self.online = True
         
     def is_online(self) -> bool:
@@ -118,6 +175,18 @@ class Network:
         self.online = is_online
         
     def add_node(self, node: NetworkNode):
+        existing = self.nodes.get(node.node_id)
+        if existing is not None:
+            node.index = existing.index
+            self._node_list[node.index] = node
+            # Trust belongs to the replaced node object, not to its index
+            if node._is_trusted(node.trust_threshold):
+                self._trusted_set.add(node.index)
+            else:
+                self._trusted_set.discard(node.index)
+        else:
+            node.index = len(self._node_list)
+            self._node_list.append(node)
         self.nodes[node.node_id] = node
         
     def broadcast_transaction(self, tx: Transaction) -> bool:
@@ -128,43 +197,49 @@ class Network:
         if tx.tx_id in self.transactions:
             return False
             
-        if any(pid in self.global_greylist for pid in tx.participants):
+        node_list = self._node_list
+        assert all(0 <= pid < len(node_list) for pid in tx.participants), \
+            f"{tx.tx_id} has participants outside the network"
+        if not self.global_greylist.isdisjoint(tx.participants):
             return False
 
-        for node_id in tx.participants:
-            if node_id in self.nodes:
-                node = self.nodes[node_id]
-                if node.greylisted:
-                    return False
-                for tx_id, existing_tx in node.chain.items():
-                    if tx_id in self.transactions and \
-                       self.transactions[tx_id].data != existing_tx.data:
-                        self._handle_inconsistency(tx.participants)
-                        return False
+        nodes = [node_list[pid] for pid in tx.participants]
+
+        for node in nodes:
+            if node.greylisted:
+                return False
+            existing = node.chain.get(tx.tx_id)
+            if existing is not None and not existing.same_data(tx):
+                self._handle_inconsistency(tx.participants)
+                return False
         
         self.transactions[tx.tx_id] = tx
-        for node_id in tx.participants:
-            if node_id in self.nodes:
-                node = self.nodes[node_id]
-                node.chain[tx.tx_id] = tx
-                for other_id in tx.participants:
-                    if other_id != node_id:
-                        node.successful_interactions[other_id] += 1
+        for node in nodes:
+            node.chain[tx.tx_id] = tx
+            node._chain_list.append(tx)
+            for other in nodes:
+                if other is not node:
+                    node.successful_interactions[other.index] += 1
+                    node._interactions_total += 1
+                    if node._interactions_total == node.trust_threshold * 10 + 1:
+                        self._trusted_set.add(node.index)
         return True
         
-    def _handle_inconsistency(self, participant_ids: List[str]):
+    def _handle_inconsistency(self, participant_ids: Iterable[int]):
         """Handle chain inconsistency by greylisting all participants"""
-        for node_id in participant_ids:
-            if node_id in self.nodes:
-                node = self.nodes[node_id]
-                node.greylisted = True
-                self.global_greylist.add(node_id)
-                node.successful_interactions.clear()
+        for index in participant_ids:
+            node = self._node_list[index]
+            node.greylisted = True
+            self.global_greylist.add(index)
+            node.successful_interactions.clear()
+            node._interactions_total = 0
+            self._trusted_set.discard(index)
 
-def run_antigaming_simulation(num_honest: int = 9900, 
-                            num_sybils: int = 100, 
-                            total_rounds: int = 1000):
-    """Run the anti-gaming simulation with the specified parameters"""
+def _simulate_rounds(num_honest: int, num_sybils: int, rounds: range,
+                     seed: Optional[int] = None) -> Dict[str, int]:
+    """Simulate the given rounds on a fresh network and return its statistics"""
+    if seed is not None:
+        random.seed(seed)
     network = Network()
     
     # Create and add nodes
@@ -182,17 +257,27 @@ def run_antigaming_simulation(num_honest: int = 9900,
         'network_issues': 0
     }
     
+    node_list = network._node_list
+    _rr = random.randrange
+    _rand = random.random
+    
     # Main simulation loop
-    for round_num in range(total_rounds):
+    for round_num in rounds:
         # Randomly simulate network issues (1% chance)
-        if random.random() < 0.01:
+        if _rand() < 0.01:
             network.simulate_network_issue(False)
             stats['network_issues'] += 1
-        elif not network.is_online() and random.random() < 0.1:
+        elif not network.online and _rand() < 0.1:
             network.simulate_network_issue(True)
         
-        # Select random nodes to interact
-        node1, node2 = random.sample(list(network.nodes.values()), 2)
+        # Select two distinct random nodes to interact: draw j from the other
+        # n - 1 slots and shift it past i
+        n = len(node_list)
+        i = _rr(n)
+        j = _rr(n - 1)
+        if j >= i:
+            j += 1
+        node1, node2 = node_list[i], node_list[j]
         
         # Run trust verification
         trust_result = node1.verify_trust(node2, network)
@@ -210,24 +295,66 @@ def run_antigaming_simulation(num_honest: int = 9900,
         
         # Create transaction
         tx_id = f"tx_{round_num}_{node1.node_id[:4]}_{node2.node_id[:4]}"
-        tx = Transaction(tx_id, [node1.node_id, node2.node_id], {"value": "test"})
+        data = {"value": "test"}
         
         # Sybils will sometimes create invalid transactions
-        if (node1.is_sybil or node2.is_sybil) and random.random() < 0.3:
-            tx.data["value"] = "malicious"
+        if (node1.is_sybil or node2.is_sybil) and _rand() < 0.3:
+            data["value"] = "malicious"
+        tx = Transaction(tx_id, [node1.index, node2.index], data)
             
         if network.broadcast_transaction(tx):
             stats['interactions_successful'] += 1
         else:
             stats['greylist_events'] += 1
     
+    stats['num_nodes'] = len(network.nodes)
+    stats['num_greylisted'] = len([n for n in network.nodes.values() if n.greylisted])
+    stats['num_sybils_greylisted'] = len([n for n in network.nodes.values() 
+                                        if n.greylisted and n.is_sybil])
+    return stats
+
+def run_antigaming_simulation(num_honest: int = 9900, 
+                            num_sybils: int = 100, 
+                            total_rounds: int = 1000,
+                            workers: Optional[int] = 1,
+                            seed: Optional[int] = None):
+    """Run the anti-gaming simulation with the specified parameters
+
+    With more than one worker (None means one per CPU) the rounds are split
+    into chunks, each simulated on an independent network in its own
+    process and seeded with seed + chunk index; their statistics are summed.
+    The fork cost only pays off from roughly 50k rounds.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or total_rounds < 2:
+        num_networks = 1
+        stats = _simulate_rounds(num_honest, num_sybils, range(total_rounds), seed)
+    else:
+        chunk_size = -(-total_rounds // workers)
+        chunks = [range(start, min(start + chunk_size, total_rounds))
+                  for start in range(0, total_rounds, chunk_size)]
+        num_networks = len(chunks)
+        base_seed = seed if seed is not None else random.randrange(2 ** 32)
+        stats = collections.Counter()
+        with ProcessPoolExecutor(max_workers=num_networks) as pool:
+            for chunk_stats in pool.map(_simulate_rounds,
+                                        itertools.repeat(num_honest),
+                                        itertools.repeat(num_sybils),
+                                        chunks,
+                                        range(base_seed, base_seed + num_networks)):
+                stats.update(chunk_stats)
+    
     # Calculate and print results
-    num_greylisted = len([n for n in network.nodes.values() if n.greylisted])
-    num_sybils_greylisted = len([n for n in network.nodes.values() 
-                               if n.greylisted and n.is_sybil])
+    num_greylisted = stats['num_greylisted']
+    num_sybils_greylisted = stats['num_sybils_greylisted']
+    total_honest = num_honest * num_networks
+    total_sybils = num_sybils * num_networks
     
     print("\n=== Enhanced Anti-Gaming Simulation Results ===")
-    print(f"Total nodes: {len(network.nodes):,} ({num_sybils} sybils)")
+    if num_networks > 1:
+        print(f"Independent networks: {num_networks}")
+    print(f"Total nodes: {stats['num_nodes']:,} ({total_sybils} sybils)")
     print(f"Nodes greylisted: {num_greylisted} ({num_sybils_greylisted} sybils)")
     print(f"Greylist events: {stats['greylist_events']}")
     print(f"Network issues simulated: {stats['network_issues']}")
@@ -238,14 +365,14 @@ def run_antigaming_simulation(num_honest: int = 9900,
         print(f"Interaction success rate: {success_rate:.1f}%")
     
     # Calculate detection metrics
-    if num_sybils > 0:
-        detection_rate = (num_sybils_greylisted / num_sybils) * 100
+    if total_sybils > 0:
+        detection_rate = (num_sybils_greylisted / total_sybils) * 100
         print(f"Sybil detection rate: {detection_rate:.1f}%")
     
     # Calculate false positive rate (honest nodes greylisted)
     num_honest_greylisted = num_greylisted - num_sybils_greylisted
-    if num_honest > 0:
-        false_positive_rate = (num_honest_greylisted / num_honest) * 100
+    if total_honest > 0:
+        false_positive_rate = (num_honest_greylisted / total_honest) * 100
         print(f"False positive rate: {false_positive_rate:.2f}%")
 
 if __name__ == "__main__":
@@ -1,31 +1,112 @@
 import time
 import random
+import itertools
+import numpy as np
 # Assume libraries like pandas for data handling and a mock NLP library
 # for the heuristic engine are available.
 
+BITMAP_MIN_MATCHES = 256 # Tag groups smaller than this merge faster as Python sets
+BITMAP_MAX_ENTITIES = 2 ** 20 # Above this, find_match merges tag arrays by sorting
+
 class TripletEngine:
+    """Triplet matcher over an index of 'Has' entities by context tag.
+
+    Entity ids and tags are interned with a dict, so null values keep
+    Python's own hash/eq semantics, None and NaN included:
+
+    >>> nan = float('nan')
+    >>> engine = TripletEngine([
+    ...     {'entity_id': None, 'relation': 'Has', 'context_tags': ['b']},
+    ...     {'entity_id': nan, 'relation': 'Has', 'context_tags': ['b', 'c']},
+    ...     {'entity_id': 'x', 'relation': 'Has', 'context_tags': ['a', None]},
+    ...     {'entity_id': 'y', 'relation': 'Has', 'context_tags': [nan]},
+    ... ])
+    >>> engine.build_index()
+    >>> engine.find_match({'context_tags': ['c']})
+    [nan]
+    >>> sorted(engine.find_match({'context_tags': ['b']}), key=repr)
+    [None, nan]
+    >>> engine.find_match({'context_tags': [None]})
+    ['x']
+    >>> engine.find_match({'context_tags': [nan]})
+    ['y']
+    """
+
     def __init__(self, dataset):
         self.dataset = dataset
-        self.index = {} # Hash map for context tags
+        self.members = {} # Context tag -> list of 'Has' entity_ids
+        self.index = {} # Large tags only: context tag -> sorted int32 entity codes
+        self.entity_codes = {} # entity_id -> entity code
+        self.entities = np.empty(0, dtype=object) # Entity code -> entity_id
+        self._bitmap = np.zeros(0, dtype=bool) # Scratch space, all False between calls
 
     def build_index(self):
         # Pre-process and index all 'Has' requests by their context tags
+        members = {}
         for item in self.dataset:
             if item['relation'] == 'Has':
+                entity = item['entity_id']
                 for tag in item['context_tags']:
-                    if tag not in self.index:
-                        self.index[tag] = []
-                    self.index[tag].append(item['entity_id'])
+                    group = members.get(tag)
+                    if group is None:
+                        members[tag] = [entity]
+                    else:
+                        group.append(entity)
+        self.members = members
+        large = [tag for tag, group in members.items() if len(group) >= BITMAP_MIN_MATCHES]
+        if not large:
+            # find_match never leaves the Python path, so skip the int codes
+            self.index, self.entity_codes = {}, {}
+            self.entities = np.empty(0, dtype=object)
+            self._bitmap = np.zeros(0, dtype=bool)
+            return
+        # Intern entities to small ints; dict keys keep Python's hash/eq
+        entity_codes = dict.fromkeys(itertools.chain.from_iterable(members.values()))
+        for code, entity in enumerate(entity_codes):
+            entity_codes[entity] = code
+        self.entity_codes = entity_codes
+        self.entities = np.fromiter(entity_codes, dtype=object, count=len(entity_codes))
+        self._bitmap = np.zeros(len(entity_codes), dtype=bool)
+        # Only groups find_match would hand to NumPy need code arrays
+        self.index = {
+            tag: np.sort(np.fromiter(map(entity_codes.__getitem__, members[tag]),
+                                     dtype=np.int32, count=len(members[tag])))
+            for tag in large
+        }
 
     def find_match(self, need_item):
-        # Find matches by looking up tags in the index
+        # Find matches by looking up tags in the index; small tag groups are
+        # merged as Python sets, where NumPy call overhead would dominate
         potential_matches = set()
         for tag in need_item['context_tags']:
-            if tag in self.index:
-                for entity in self.index[tag]:
-                    potential_matches.add(entity)
+            group = self.members.get(tag)
+            if group is not None:
+                if len(group) >= BITMAP_MIN_MATCHES:
+                    return self._merge_arrays(need_item['context_tags'])
+                potential_matches.update(group)
         return list(potential_matches)
 
+    def _merge_arrays(self, context_tags):
+        arrays = []
+        for tag in context_tags:
+            codes = self.index.get(tag)
+            if codes is None:
+                group = self.members.get(tag)
+                if group is None:
+                    continue
+                codes = [self.entity_codes[entity] for entity in group]
+            arrays.append(codes)
+        if len(self.entities) < BITMAP_MAX_ENTITIES:
+            # Small id space: OR the tag arrays into a bitmap instead of sorting
+            bitmap = self._bitmap
+            for codes in arrays:
+                bitmap[codes] = True
+            matched = np.flatnonzero(bitmap)
+            bitmap[matched] = False
+        else:
+            matched = np.unique(np.concatenate(arrays))
+        return self.entities[matched].tolist()
+
 class HeuristicEngine:
     def __init__(self, dataset):
         self.dataset = dataset